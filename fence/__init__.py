@@ -27,7 +27,7 @@ from fence.resources.openid.ras_oauth2 import RASOauth2Client as RASClient
 from fence.resources.storage import StorageManager
 from fence.resources.user.user_session import UserSessionInterface
 from fence.error_handler import get_error_response
-from fence.utils import random_str
+from fence.utils import clear_request_cache, random_str
 from fence.config import config
 from fence.settings import CONFIG_SEARCH_FOLDERS
 import fence.blueprints.admin
@@ -387,6 +387,15 @@ def handle_error(error):
     return get_error_response(error)
 
 
+@app.before_request
+def reset_request_cache():
+    """
+    Make sure `request_cached` results never outlive a request, even when
+    the app context is reused across requests.
+    """
+    clear_request_cache()
+
+
 @app.before_request
 def check_csrf():
     has_auth = "Authorization" in flask.request.headers
@@ -413,7 +422,26 @@ def set_csrf(response):
     if not flask.request.cookies.get("csrftoken"):
         secure = config.get("SESSION_COOKIE_SECURE", True)
         response.set_cookie("csrftoken", random_str(40), secure=secure)
+    return response
+
+
+@app.after_request
+def commit_db_session(response):
+    """
+    Commit the work done in the db session during the request before the
+    response is sent, or roll it back if the request failed.
+
+    NOTE: db entries tracking resources created outside of fence (e.g. Google
+          service accounts and keys) are committed as soon as they are
+          written, since rolling them back would orphan those resources.
+    """
+    if response.status_code >= 400:
+        current_session.rollback()
+        return response
 
-    if flask.request.method in ["POST", "PUT", "DELETE"]:
+    try:
         current_session.commit()
+    except Exception:
+        current_session.rollback()
+        raise
     return response
@@ -25,6 +25,7 @@ from fence.resources.google.utils import (
 )
 from fence.utils import (
     clear_cookies,
+    clear_request_cache,
     append_query_params,
     get_valid_expiration_from_request,
 )
@@ -240,6 +241,7 @@ class GoogleLinkRedirect(Resource):
 
         current_session.delete(g_account)
         current_session.commit()
+        clear_request_cache()
 
         # clear session and cookies so access token and session don't have
         # outdated linkage info
@@ -542,6 +544,7 @@ def add_new_user_google_account(user_id, google_email, session):
     user_google_account = UserGoogleAccount(email=google_email, user_id=user_id)
     session.add(user_google_account)
     session.commit()
+    clear_request_cache()
     return user_google_account
 
 
@@ -76,6 +76,7 @@ class GoogleCredentialsList(Resource):
                 user_id=user_id,
                 username=username,
                 proxy_group_id=proxy_group_id,
+                g_cloud_manager=g_cloud_manager,
             )
 
             keys = g_cloud_manager.get_service_account_keys_info(service_account.email)
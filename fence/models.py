@@ -19,6 +19,7 @@ from sqlalchemy import (
     String,
     Column,
     Boolean,
+    Index,
     Text,
     MetaData,
     Table,
@@ -300,6 +301,17 @@ class GoogleServiceAccount(Base):
 
     email = Column(String, unique=True, nullable=False)
 
+    __table_args__ = (
+        # service accounts are looked up by client and user on token exchange
+        Index("ix_google_sa_client_user", "client_id", "user_id"),
+        # a user's primary service account is the one with no client
+        Index(
+            "ix_google_sa_primary",
+            "user_id",
+            postgresql_where=client_id.is_(None),
+        ),
+    )
+
     def delete(self):
         with flask.current_app.db.session as session:
             session.delete(self)
@@ -317,8 +329,13 @@ class UserGoogleAccount(Base):
     user_id = Column(Integer, ForeignKey(User.id, ondelete="CASCADE"), nullable=False)
     user = relationship(
         "User",
+        # nothing reads this collection, so make any accidental lazy load
+        # (an N+1 when iterating over users) fail loudly instead
         backref=backref(
-            "user_google_accounts", cascade="all, delete-orphan", passive_deletes=True
+            "user_google_accounts",
+            cascade="all, delete-orphan",
+            passive_deletes=True,
+            lazy="raise",
         ),
     )
 
@@ -690,6 +707,9 @@ def migrate(driver):
         metadata=md,
     )
 
+    for index in GoogleServiceAccount.__table__.indexes:
+        add_index_if_not_exist(index=index, driver=driver, metadata=md)
+
     _update_for_authlib(driver, md)
 
     # Delete-user migration
@@ -997,6 +1017,21 @@ def add_unique_constraint_if_not_exist(table_name, column_name, driver, metadata
                 session.commit()
 
 
+def add_index_if_not_exist(index, driver, metadata):
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore",
+            message="Predicate of partial index \S+ ignored during reflection",
+            category=sa_exc.SAWarning,
+        )
+        table = Table(
+            index.table.name, metadata, autoload=True, autoload_with=driver.engine
+        )
+
+    if index.name not in [existing_index.name for existing_index in table.indexes]:
+        index.create(bind=driver.engine)
+
+
 def drop_unique_constraint_if_exist(table_name, column_name, driver, metadata):
     table = Table(table_name, metadata, autoload=True, autoload_with=driver.engine)
     constraint_name = "{}_{}_key".format(table_name, column_name)
@@ -1,10 +1,14 @@
+import functools
 import time
 import json
 import os
 from cryptography.fernet import Fernet
 import flask
 from flask_sqlalchemy_session import current_session
-from sqlalchemy import desc, func
+from sqlalchemy import bindparam, desc, func
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import scoped_session
+from werkzeug.local import LocalProxy
 
 from cdislogging import get_logger
 from cirrus import GoogleCloudManager
@@ -30,12 +34,17 @@ from fence.models import (
     ServiceAccountToGoogleBucketAccessGroup,
 )
 from fence.resources.google import STORAGE_ACCESS_PROVIDER_NAME
+from fence.utils import request_cached
 from fence.errors import NotSupported, NotFound
 
 from cdislogging import get_logger
 
 logger = get_logger(__name__)
 
+# caches the construction and SQL compilation of the service account and
+# linked account lookups below, which run on hot request paths
+bakery = baked.bakery()
+
 
 def get_or_create_primary_service_account_key(
     user_id, username, proxy_group_id, expires=None
@@ -60,10 +69,9 @@ def get_or_create_primary_service_account_key(
             (only used if a new key is required!)
 
     Returns:
-        dict: JSON Google Credentials
-
-    Raises:
-        InternalError: User doesn't have a primary service account
+        Tuple[dict, object]: JSON Google Credentials and the `private_key`
+            and `expires` of the existing key's db entry (None if a new key
+            was created)
     """
     sa_private_key = {}
     user_service_account_key = _get_primary_service_account_key(
@@ -85,24 +93,26 @@ def get_or_create_primary_service_account_key(
 
 
 def _get_primary_service_account_key(user_id, username, proxy_group_id):
-    user_service_account_key = None
-
-    # Note that client_id is None, which is how we store the user's SA
-    user_google_service_account = get_service_account(client_id=None, user_id=user_id)
-
-    if user_google_service_account:
-        user_service_account_key = (
-            current_session.query(GoogleServiceAccountKey)
-            .filter(
-                GoogleServiceAccountKey.service_account_id
-                == user_google_service_account.id
-            )
-            .filter(GoogleServiceAccountKey.private_key.isnot(None))
-            .order_by(desc(GoogleServiceAccountKey.expires))
-            .first()
+    # Note that client_id is None, which is how we store the user's SA.
+    # Get the latest key with a private key across the user's SAs in a single
+    # query, selecting only the columns needed so no ORM objects are built.
+    baked_query = bakery(
+        lambda session: session.query(
+            GoogleServiceAccountKey.private_key, GoogleServiceAccountKey.expires
         )
-
-    return user_service_account_key
+        .join(
+            GoogleServiceAccount,
+            GoogleServiceAccountKey.service_account_id == GoogleServiceAccount.id,
+        )
+        .filter(GoogleServiceAccountKey.private_key.isnot(None))
+        .order_by(desc(GoogleServiceAccountKey.expires).nullslast())
+    )
+    _bake_service_account_filter(baked_query, client_id=None)
+    return (
+        baked_query(_get_baked_query_session(current_session))
+        .params(user_id=user_id)
+        .first()
+    )
 
 
 def create_primary_service_account_key(user_id, username, proxy_group_id, expires=None):
@@ -143,10 +153,7 @@ def create_primary_service_account_key(user_id, username, proxy_group_id, expire
     private_key_bytes = json.dumps(sa_private_key).encode("utf-8")
     private_key = fernet_key.encrypt(private_key_bytes).decode("utf-8")
 
-    expires = expires or (
-        int(time.time())
-        + config["GOOGLE_SERVICE_ACCOUNT_KEY_FOR_URL_SIGNING_EXPIRES_IN"]
-    )
+    expires = expires or get_default_service_account_key_expiration()
 
     add_custom_service_account_key_expiration(
         key_id, service_account.id, expires, private_key=private_key
@@ -257,13 +264,20 @@ def give_service_account_billing_access_if_necessary(
         )
 
 
-def create_google_access_key(client_id, user_id, username, proxy_group_id):
+def create_google_access_key(
+    client_id, user_id, username, proxy_group_id, g_cloud_manager=None
+):
     """
     Return an access key for current user and client.
 
     NOTE: This will create a service account for the client if one does
     not exist.
 
+    Args:
+        g_cloud_manager (cirrus.GoogleCloudManager, optional): instance of
+            cloud manager to use for both creating the service account (if
+            needed) and its key. A new one is opened if not provided.
+
     Returns:
 
         JSON key in Google Credentials File format:
@@ -284,16 +298,26 @@ def create_google_access_key(client_id, user_id, username, proxy_group_id):
                 "client_x509_cert_url": "https://www.googleapis.com/...<api-name>api%40project-id.iam.gserviceaccount.com"
             }
     """
+    if not g_cloud_manager:
+        with GoogleCloudManager() as g_cloud_manager:
+            return create_google_access_key(
+                client_id,
+                user_id,
+                username,
+                proxy_group_id,
+                g_cloud_manager=g_cloud_manager,
+            )
+
     key = {}
     service_account = get_or_create_service_account(
         client_id=client_id,
         user_id=user_id,
         username=username,
         proxy_group_id=proxy_group_id,
+        g_cloud_manager=g_cloud_manager,
     )
 
-    with GoogleCloudManager() as g_cloud:
-        key = g_cloud.get_access_key(service_account.email)
+    key = g_cloud_manager.get_access_key(service_account.email)
 
     logger.info(
         "Created key with id {} for service account {} in user {}'s "
@@ -323,13 +347,20 @@ def _get_linked_google_account(user_id, db=None):
     return g_account
 
 
+@request_cached
 def get_linked_google_account_email(user_id, db=None):
     """
     Hit db to check for linked google account email of user
     """
     google_email = None
     if user_id:
-        g_account = _get_linked_google_account(user_id, db=db)
+        session = _get_baked_query_session(get_db_session(db))
+        baked_query = bakery(
+            lambda session: session.query(UserGoogleAccount.email).filter(
+                UserGoogleAccount.user_id == bindparam("user_id")
+            )
+        )
+        g_account = baked_query(session).params(user_id=user_id).first()
         if g_account:
             google_email = g_account.email
     return google_email
@@ -363,13 +394,17 @@ def add_custom_service_account_key_expiration(
     """
     Add db entry of user service account key and its custom expiration.
     """
-    sa_key = GoogleServiceAccountKey(
-        key_id=key_id,
-        service_account_id=service_account_id,
-        expires=expires,
-        private_key=private_key,
+    # this row isn't read back in the same session, so skip the ORM
+    current_session.execute(
+        GoogleServiceAccountKey.__table__.insert().values(
+            key_id=key_id,
+            service_account_id=service_account_id,
+            expires=expires,
+            private_key=private_key,
+        )
     )
-    current_session.add(sa_key)
+    # commit right away so the key created in Google keeps its expiration
+    # entry (and gets cleaned up) even if the rest of the request fails
     current_session.commit()
 
 
@@ -386,31 +421,84 @@ def get_service_account(client_id, user_id):
     Returns:
         fence.models.GoogleServiceAccount: Client's service account
     """
+    baked_query = bakery(lambda session: session.query(GoogleServiceAccount))
+    _bake_service_account_filter(baked_query, client_id)
     service_account = (
-        current_session.query(GoogleServiceAccount)
-        .filter_by(client_id=client_id, user_id=user_id)
+        baked_query(_get_baked_query_session(current_session))
+        .params(client_id=client_id, user_id=user_id)
         .first()
     )
 
     return service_account
 
 
-def get_or_create_service_account(client_id, user_id, username, proxy_group_id):
+def get_service_account_email_for_client(client_id, user_id):
+    """
+    Return the email of the service account (from Fence db) for given client,
+    without loading the whole service account.
+
+    NOTE: Pass in `None` as the client_id to get the user's "primary"
+          service account.
+
+    Returns:
+        str: Client's service account email or None
+    """
+    baked_query = bakery(
+        lambda session: session.query(GoogleServiceAccount).with_entities(
+            GoogleServiceAccount.email
+        )
+    )
+    _bake_service_account_filter(baked_query, client_id)
+    service_account = (
+        baked_query(_get_baked_query_session(current_session))
+        .params(client_id=client_id, user_id=user_id)
+        .first()
+    )
+
+    return service_account.email if service_account else None
+
+
+def _bake_service_account_filter(baked_query, client_id):
+    """
+    Add criteria to a baked GoogleServiceAccount query to filter on the
+    `client_id` and `user_id` bound parameters.
+
+    A `None` client_id (the user's primary service account) has to be baked
+    as `IS NULL` since comparing against a NULL bound parameter never matches.
+    """
+    if client_id is None:
+        baked_query.add_criteria(
+            lambda query: query.filter(GoogleServiceAccount.client_id.is_(None))
+        )
+    else:
+        baked_query.add_criteria(
+            lambda query: query.filter(
+                GoogleServiceAccount.client_id == bindparam("client_id")
+            )
+        )
+    baked_query.add_criteria(
+        lambda query: query.filter(GoogleServiceAccount.user_id == bindparam("user_id"))
+    )
+
+
+def get_or_create_service_account(
+    client_id, user_id, username, proxy_group_id, g_cloud_manager=None
+):
     """
     Create a Google Service account for the current client and user.
     This effectively handles conflicts in Google and will update our db
     accordingly based on the newest information from Google.
 
     Args:
-        g_cloud_manager (cirrus.GoogleCloudManager): instance of
-        cloud manager to use
+        g_cloud_manager (cirrus.GoogleCloudManager, optional): instance of
+        cloud manager to use, a new one is opened if not provided
 
     Returns:
         fence.models.GoogleServiceAccount: New service account
     """
     if proxy_group_id:
         if client_id:
-            service_account_id = get_valid_service_account_id_for_client(
+            service_account_id = _get_valid_service_account_id_for_client(
                 client_id, user_id, prefix=config["GOOGLE_SERVICE_ACCOUNT_PREFIX"]
             )
         else:
@@ -418,10 +506,19 @@ def get_or_create_service_account(client_id, user_id, username, proxy_group_id):
                 user_id, username, prefix=config["GOOGLE_SERVICE_ACCOUNT_PREFIX"]
             )
 
-        with GoogleCloudManager() as g_cloud:
-            new_service_account = g_cloud.create_service_account_for_proxy_group(
-                proxy_group_id, account_id=service_account_id
+        if g_cloud_manager:
+            new_service_account = (
+                g_cloud_manager.create_service_account_for_proxy_group(
+                    proxy_group_id, account_id=service_account_id
+                )
             )
+        else:
+            with GoogleCloudManager() as g_cloud_manager:
+                new_service_account = (
+                    g_cloud_manager.create_service_account_for_proxy_group(
+                        proxy_group_id, account_id=service_account_id
+                    )
+                )
 
         return _update_service_account_db_entry(
             client_id, user_id, proxy_group_id, new_service_account
@@ -446,7 +543,7 @@ def _update_service_account_db_entry(
         # remove that SA from the db b/c we'll be using the new one from now on
         # - construct old email using account id provided and
         # domain from new email to find the db entry
-        old_service_account_id = get_valid_service_account_id_for_client(
+        old_service_account_id = _get_valid_service_account_id_for_client(
             client_id, user_id
         )
         old_sa_email = "@".join(
@@ -504,6 +601,8 @@ def _update_service_account_db_entry(
         service_account_db_entry.email = new_service_account["email"]
         service_account_db_entry.google_project_id = (new_service_account["projectId"],)
 
+    # commit right away: the SA already exists in Google, so its db entry
+    # must not be lost if the rest of the request fails
     current_session.commit()
 
     logger.info(
@@ -515,6 +614,15 @@ def _update_service_account_db_entry(
     return service_account_db_entry
 
 
+@functools.lru_cache(maxsize=4096)
+def _get_valid_service_account_id_for_client(client_id, user_id, prefix=""):
+    """
+    Cached `cirrus.google_cloud.utils.get_valid_service_account_id_for_client`.
+    The id is derived only from the arguments, so it never needs invalidating.
+    """
+    return get_valid_service_account_id_for_client(client_id, user_id, prefix=prefix)
+
+
 def get_or_create_proxy_group_id():
     """
     If no username returned from token or database, create a new proxy group
@@ -619,6 +727,12 @@ def get_default_google_account_expiration():
     return expiration
 
 
+def get_default_service_account_key_expiration():
+    now = int(time.time())
+    expiration = now + config["GOOGLE_SERVICE_ACCOUNT_KEY_FOR_URL_SIGNING_EXPIRES_IN"]
+    return expiration
+
+
 def get_users_linked_google_email(user_id):
     """
     Return user's linked google account's email.
@@ -876,6 +990,18 @@ def is_google_managed_service_account(service_account_email):
     return service_account_domain in google_managed_service_account_domains
 
 
+def _get_baked_query_session(session):
+    """
+    Baked queries need an actual Session, so resolve the scoped session
+    (e.g. `current_session`) to the Session for the current scope.
+    """
+    if isinstance(session, LocalProxy):
+        session = session._get_current_object()
+    if isinstance(session, scoped_session):
+        return session()
+    return session
+
+
 def get_db_session(db=None):
     if db:
         return SQLAlchemyDriver(db).Session()
@@ -11,7 +11,7 @@ def get_group_info(current_session, groupname):
     if not group:
         raise UserError("Error: group doesn't exist")
 
-    projects = get_group_projects(current_session, groupname)
+    projects = udm.get_group_projects(current_session, group)
     return {"name": group.name, "description": group.description, "projects": projects}
 
 
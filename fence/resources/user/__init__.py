@@ -13,7 +13,7 @@ from fence.resources import userdatamodel as udm
 from fence.resources.google.utils import (
     get_linked_google_account_email,
     get_linked_google_account_exp,
-    get_service_account,
+    get_service_account_email_for_client,
 )
 from fence.resources.userdatamodel import get_user_groups
 
@@ -96,9 +96,9 @@ def get_user_info(current_session, username):
     }
 
     # User SAs are stored in db with client_id = None
-    primary_service_account = get_service_account(client_id=None, user_id=user.id) or {}
-    primary_service_account_email = getattr(primary_service_account, "email", None)
-    info["primary_google_service_account"] = primary_service_account_email
+    info["primary_google_service_account"] = get_service_account_email_for_client(
+        client_id=None, user_id=user.id
+    )
 
     if hasattr(flask.current_app, "arborist"):
         try:
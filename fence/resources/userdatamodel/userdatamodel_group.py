@@ -74,21 +74,13 @@ def get_group_users(current_session, group):
 
 
 def get_group_projects(current_session, group):
-    projects_to_group = (
-        current_session.query(AccessPrivilege)
+    projects = (
+        current_session.query(Project.name)
+        .join(AccessPrivilege, AccessPrivilege.project_id == Project.id)
         .filter(AccessPrivilege.group_id == group.id)
         .all()
     )
-    projects = []
-    for project in projects_to_group:
-        new_project = (
-            current_session.query(Project)
-            .filter(Project.id == project.project_id)
-            .first()
-        )
-        if new_project:
-            projects.append(new_project.name)
-    return projects
+    return [project.name for project in projects]
 
 
 def get_empty_group():
@@ -123,6 +123,37 @@ def hash_secret(f):
     return wrapper
 
 
+def request_cached(f):
+    """
+    Cache the result of the decorated function for the rest of the current
+    request, keyed on the arguments it was called with. Outside of an app
+    context (e.g. in scripts) the function is always called.
+
+    Call `clear_request_cache` after writing anything the function reads.
+    """
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not flask.has_app_context():
+            return f(*args, **kwargs)
+
+        cache = flask.g.setdefault("_request_cache", {})
+        key = (f.__module__, f.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in cache:
+            cache[key] = f(*args, **kwargs)
+        return cache[key]
+
+    return wrapper
+
+
+def clear_request_cache():
+    """
+    Drop all results cached by `request_cached` functions for this request.
+    """
+    if flask.has_app_context():
+        flask.g.pop("_request_cache", None)
+
+
 def wrap_list_required(f):
     @wraps(f)
     def wrapper(d, *args, **kwargs):
@@ -1,17 +1,20 @@
+from collections import Counter
+
 import fence.resources.admin as adm
 from fence.models import Group, AccessPrivilege, Project, User
 import pytest
 from fence.errors import UserError, NotFound
 
 
-def test_get_group(db_session, awg_users):
-    info = adm.get_group_info(db_session, "test_group_2")
+def test_get_group(db_session, awg_users, count_queries):
+    db_session.flush()
+    with count_queries() as queries:
+        info = adm.get_group_info(db_session, "test_group_2")
+    assert len(queries) <= 2
     assert info["name"] == "test_group_2"
     assert info["description"] == "the second test group"
     expected_projects = ["test_project_1", "test_project_2"]
-    expected_projects.sort()
-    info["projects"].sort()
-    assert info["projects"] == expected_projects
+    assert Counter(info["projects"]) == Counter(expected_projects)
 
 
 def test_get_inexistent_group(db_session, awg_users):
@@ -19,10 +22,13 @@ def test_get_inexistent_group(db_session, awg_users):
         info = adm.get_group_info(db_session, "test_group_XXX")
 
 
-def test_create_group(db_session):
-    group = db_session.query(Group).filter_by(name="new_group_1").first()
-    assert group == None
-    adm.create_group(db_session, "new_group_1", "a new group")
+def test_create_group(db_session, count_queries):
+    assert not db_session.query(
+        db_session.query(Group).filter_by(name="new_group_1").exists()
+    ).scalar()
+    with count_queries() as queries:
+        adm.create_group(db_session, "new_group_1", "a new group")
+    assert len(queries) <= 2
     group = db_session.query(Group).filter_by(name="new_group_1").first()
     assert group.name == "new_group_1"
     assert group.description == "a new group"
@@ -5,6 +5,7 @@ TODO (rudyardrichter, 2018-11-06): clean up/consolidate indexd response mocks
 """
 
 from collections import OrderedDict
+from contextlib import contextmanager
 from boto3 import client
 import uuid
 import json
@@ -29,6 +30,7 @@ from mock import patch, MagicMock
 from moto import mock_sts
 import pytest
 import requests
+from sqlalchemy import event
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.schema import DropTable
 
@@ -38,6 +40,7 @@ from fence import models
 from fence.jwt.keys import Keypair
 from fence.config import config
 from fence.errors import NotFound
+from fence.utils import clear_request_cache
 
 import tests
 from tests import test_settings
@@ -395,6 +398,47 @@ def db_session(db, patch_app_db_session):
     connection.close()
 
 
+@pytest.fixture(scope="function")
+def reset_request_cache(app):
+    """
+    Clear `request_cached` results left in `flask.g` by earlier tests, since
+    the app context is reused between tests and only client requests reset it.
+    """
+    clear_request_cache()
+    yield
+    clear_request_cache()
+
+
+@pytest.fixture(scope="function")
+def count_queries(db_session):
+    """
+    Return a context manager which records the SQL statements executed
+    on the database session's connection while it is open, e.g.
+
+        with count_queries() as queries:
+            ...
+        assert len(queries) <= 2
+    """
+
+    @contextmanager
+    def do_count():
+        statements = []
+        connection = db_session.connection()
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+    return do_count
+
+
 @pytest.fixture(scope="function")
 def oauth_user(app, db_session):
     users = dict(json.loads(utils.read_file("resources/authorized_users.json")))
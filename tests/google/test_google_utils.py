@@ -0,0 +1,217 @@
+"""
+Tests for the service account db helpers in fence.resources.google.utils
+"""
+from fence.models import GoogleServiceAccount, GoogleServiceAccountKey
+from fence.resources.google.utils import (
+    _get_primary_service_account_key,
+    add_custom_service_account_key_expiration,
+    get_service_account,
+    get_service_account_email_for_client,
+)
+
+
+def _add_service_account(db_session, user_id, client_id, email):
+    service_account = GoogleServiceAccount(
+        google_unique_id=email.split("@")[0],
+        email=email,
+        user_id=user_id,
+        client_id=client_id,
+        google_project_id="projectId-0",
+    )
+    db_session.add(service_account)
+    db_session.commit()
+    return service_account
+
+
+def test_get_primary_and_client_service_account(db_session, user_client):
+    """
+    Test that the primary (client_id None) and client service accounts of the
+    same user are looked up separately.
+    """
+    primary = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+    client = _add_service_account(
+        db_session, user_client.user_id, "client", "client-sa@test.com"
+    )
+
+    assert get_service_account(None, user_client.user_id).id == primary.id
+    assert get_service_account("client", user_client.user_id).id == client.id
+    assert (
+        get_service_account_email_for_client(None, user_client.user_id) == primary.email
+    )
+    assert (
+        get_service_account_email_for_client("client", user_client.user_id)
+        == client.email
+    )
+
+
+def test_client_service_account_lookup_does_not_return_primary(db_session, user_client):
+    """
+    Test that looking up a client service account first doesn't make the
+    primary service account lookup reuse it, and vice versa.
+    """
+    primary = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+
+    assert get_service_account("client", user_client.user_id) is None
+    assert get_service_account(None, user_client.user_id).id == primary.id
+    assert get_service_account("client", user_client.user_id) is None
+
+
+def test_get_primary_service_account_key_no_service_account(
+    db_session, user_client, google_proxy_group
+):
+    """
+    Test that there's no primary key when the user has no service account.
+    """
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key is None
+
+
+def test_get_primary_service_account_key_no_keys(
+    db_session, user_client, google_proxy_group
+):
+    """
+    Test that there's no primary key when the service account has no keys.
+    """
+    _add_service_account(db_session, user_client.user_id, None, "primary-sa@test.com")
+
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key is None
+
+
+def test_get_primary_service_account_key_ignores_keys_without_private_key(
+    db_session, user_client, google_proxy_group
+):
+    """
+    Test that keys without a stored private key are not returned, even when
+    they expire later than the usable ones.
+    """
+    service_account = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+    db_session.add(
+        GoogleServiceAccountKey(
+            key_id="no-private-key",
+            service_account_id=service_account.id,
+            expires=2000,
+            private_key=None,
+        )
+    )
+    db_session.commit()
+
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key is None
+
+    db_session.add(
+        GoogleServiceAccountKey(
+            key_id="private-key",
+            service_account_id=service_account.id,
+            expires=1000,
+            private_key="private-key-0",
+        )
+    )
+    db_session.commit()
+
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key.private_key == "private-key-0"
+    assert key.expires == 1000
+
+
+def test_get_primary_service_account_key_latest_expiration(
+    db_session, user_client, google_proxy_group
+):
+    """
+    Test that the usable key expiring last is returned.
+    """
+    service_account = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+    db_session.add_all(
+        [
+            GoogleServiceAccountKey(
+                key_id="key-0",
+                service_account_id=service_account.id,
+                expires=1000,
+                private_key="private-key-0",
+            ),
+            GoogleServiceAccountKey(
+                key_id="key-1",
+                service_account_id=service_account.id,
+                expires=2000,
+                private_key="private-key-1",
+            ),
+        ]
+    )
+    db_session.commit()
+
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key.private_key == "private-key-1"
+    assert key.expires == 2000
+
+
+def test_get_primary_service_account_key_other_service_account_without_keys(
+    db_session, user_client, google_proxy_group
+):
+    """
+    Test that the key is found when the user has another primary service
+    account (e.g. an old one that was never cleaned up) without any keys.
+    """
+    _add_service_account(db_session, user_client.user_id, None, "old-sa@test.com")
+    service_account = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+    db_session.add(
+        GoogleServiceAccountKey(
+            key_id="key-0",
+            service_account_id=service_account.id,
+            expires=1000,
+            private_key="private-key-0",
+        )
+    )
+    db_session.commit()
+
+    key = _get_primary_service_account_key(
+        user_client.user_id, user_client.username, google_proxy_group.id
+    )
+    assert key.private_key == "private-key-0"
+    assert key.expires == 1000
+
+
+def test_add_custom_service_account_key_expiration(db_session, user_client):
+    """
+    Test that the key and its expiration are added, with the private key left
+    empty when not given.
+    """
+    service_account = _add_service_account(
+        db_session, user_client.user_id, None, "primary-sa@test.com"
+    )
+
+    add_custom_service_account_key_expiration(
+        "key-0", service_account.id, 1000, private_key="private-key-0"
+    )
+    add_custom_service_account_key_expiration("key-1", service_account.id, 2000)
+    db_session.commit()
+
+    keys = (
+        db_session.query(GoogleServiceAccountKey)
+        .filter_by(service_account_id=service_account.id)
+        .order_by(GoogleServiceAccountKey.key_id)
+        .all()
+    )
+    assert [(key.key_id, key.expires, key.private_key) for key in keys] == [
+        ("key-0", 1000, "private-key-0"),
+        ("key-1", 2000, None),
+    ]
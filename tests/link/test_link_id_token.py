@@ -18,7 +18,9 @@ def test_google_id_token_not_linked(oauth_test_client):
     assert id_token["context"]["user"].get("google") is None
 
 
-def test_google_id_token_linked(db_session, encoded_creds_jwt, oauth_test_client):
+def test_google_id_token_linked(
+    db_session, encoded_creds_jwt, oauth_test_client, reset_request_cache
+):
     """
     Test google email and link expiration are in id_token for a linked account
     """
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from fence.blueprints.link import GoogleLinkRedirect, add_new_user_google_account
+from fence.models import UserGoogleAccount
+from fence.resources.google.utils import get_linked_google_account_email
+
+
+def test_linked_google_email_cached_within_request(
+    db_session, user_client, reset_request_cache, count_queries
+):
+    """
+    Test that looking up the linked google email again in the same request
+    doesn't hit the db.
+    """
+    user_id = user_client.user_id
+    google_email = "some-authed-google-account@gmail.com"
+    db_session.add(UserGoogleAccount(email=google_email, user_id=user_id))
+    db_session.commit()
+
+    assert get_linked_google_account_email(user_id) == google_email
+
+    with count_queries() as queries:
+        assert get_linked_google_account_email(user_id) == google_email
+    assert not queries
+
+
+def test_linking_clears_cached_google_email(
+    db_session, user_client, reset_request_cache
+):
+    """
+    Test that linking a google account invalidates the cached (empty)
+    linked email for the user.
+    """
+    user_id = user_client.user_id
+    google_email = "some-authed-google-account@gmail.com"
+
+    assert get_linked_google_account_email(user_id) is None
+
+    add_new_user_google_account(user_id, google_email, db_session)
+
+    assert get_linked_google_account_email(user_id) == google_email
+
+
+def test_unlinking_clears_cached_google_email(
+    db_session, user_client, reset_request_cache
+):
+    """
+    Test that unlinking the google account invalidates the cached linked
+    email for the user.
+    """
+    user_id = user_client.user_id
+    google_email = "some-authed-google-account@gmail.com"
+    db_session.add(UserGoogleAccount(email=google_email, user_id=user_id))
+    db_session.commit()
+
+    assert get_linked_google_account_email(user_id) == google_email
+
+    with patch("fence.blueprints.link.current_token", {"sub": user_id}):
+        GoogleLinkRedirect._unlink_google_account()
+
+    assert get_linked_google_account_email(user_id) is None
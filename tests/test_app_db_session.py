@@ -0,0 +1,108 @@
+import flask
+from sqlalchemy.orm import sessionmaker
+
+import fence
+from fence.models import GoogleServiceAccount, GoogleServiceAccountKey, User
+from fence.resources.google.utils import add_custom_service_account_key_expiration
+from fence.utils import random_str
+
+
+def _flush_service_account(session):
+    user = User(username="user-" + random_str(10))
+    session.add(user)
+    session.flush()
+    service_account = GoogleServiceAccount(
+        google_unique_id="test-unique-id",
+        client_id=None,
+        user_id=user.id,
+        google_project_id="projectId-0",
+        email=random_str(20) + "@test.com",
+    )
+    session.add(service_account)
+    session.flush()
+    return user.id, service_account.email
+
+
+def test_error_response_does_not_persist_flushed_rows(app, db, monkeypatch):
+    """
+    Test that work flushed during a request which ends in an error response
+    is rolled back instead of committed.
+    """
+    Session = sessionmaker(bind=db.engine)
+    request_session = Session()
+    monkeypatch.setattr("fence.current_session", request_session)
+
+    _, email = _flush_service_account(request_session)
+    fence.commit_db_session(flask.Response(status=500))
+    request_session.close()
+
+    check_session = Session()
+    assert not (
+        check_session.query(GoogleServiceAccount).filter_by(email=email).first()
+    )
+    check_session.close()
+
+
+def test_successful_response_persists_flushed_rows(app, db, monkeypatch):
+    """
+    Test that work flushed during a successful GET request is committed
+    before the response is returned.
+    """
+    Session = sessionmaker(bind=db.engine)
+    request_session = Session()
+    monkeypatch.setattr("fence.current_session", request_session)
+
+    user_id, email = _flush_service_account(request_session)
+    fence.commit_db_session(flask.Response(status=200))
+    request_session.close()
+
+    check_session = Session()
+    try:
+        service_account = (
+            check_session.query(GoogleServiceAccount).filter_by(email=email).first()
+        )
+        assert service_account
+        assert service_account.user_id == user_id
+    finally:
+        check_session.query(GoogleServiceAccount).filter_by(email=email).delete()
+        check_session.query(User).filter_by(id=user_id).delete()
+        check_session.commit()
+        check_session.close()
+
+
+def test_error_response_keeps_service_account_key_entry(app, db, monkeypatch):
+    """
+    Test that the db entry for a key already created in Google is not rolled
+    back when the rest of the request fails.
+    """
+    Session = sessionmaker(bind=db.engine)
+    request_session = Session()
+    monkeypatch.setattr("fence.current_session", request_session)
+    monkeypatch.setattr("fence.resources.google.utils.current_session", request_session)
+
+    user_id, email = _flush_service_account(request_session)
+    service_account_id = (
+        request_session.query(GoogleServiceAccount.id).filter_by(email=email).scalar()
+    )
+    add_custom_service_account_key_expiration("test-key", service_account_id, 1000)
+    fence.commit_db_session(flask.Response(status=500))
+    request_session.close()
+
+    check_session = Session()
+    try:
+        key = (
+            check_session.query(GoogleServiceAccountKey)
+            .filter_by(service_account_id=service_account_id)
+            .first()
+        )
+        assert key
+        assert key.key_id == "test-key"
+        assert key.expires == 1000
+    finally:
+        check_session.query(GoogleServiceAccountKey).filter_by(
+            service_account_id=service_account_id
+        ).delete()
+        check_session.query(GoogleServiceAccount).filter_by(email=email).delete()
+        check_session.query(User).filter_by(id=user_id).delete()
+        check_session.commit()
+        check_session.close()